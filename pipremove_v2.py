@@ -11,8 +11,8 @@ import sys
 
 import attrs
 import click
-import packaging.requirements
 from more_itertools import always_iterable
+from packaging.utils import canonicalize_name
 from typing_extensions import IO, TypeAlias
 
 WHITELIST = frozenset(
@@ -20,7 +20,7 @@ WHITELIST = frozenset(
         "pip",
         "setuptools",
         "wheel",
-        "more-iterools",
+        "more-itertools",
         "packaging",
         "attrs",
         "click",
@@ -29,6 +29,8 @@ WHITELIST = frozenset(
 
 BASE_PIP_ARGS = [sys.executable, "-m", "pip"]
 
+_REQUIREMENT_NAME_END = re.compile(r"[<>=!~\s(@]")
+
 
 class _PipRemoveFilter(logging.Filterer):
     def __init__(self, verbose_level: int) -> None:
@@ -49,6 +51,7 @@ _log_fileobj: None | IO[str] = None
 class _PipRemoveLogger(logging.Logger):
     def __init__(self, quiet: bool = False, verbose_level: int = 1) -> None:
         super().__init__(__name__, logging.NOTSET)
+        self._verbose_level = verbose_level
         self.addFilter(_PipRemoveFilter(verbose_level))
         hf = logging.StreamHandler()
         f = logging.Formatter(fmt="[pip-remove] [{levelname}]: {message}", style="{")
@@ -73,6 +76,11 @@ class _PipRemoveLogger(logging.Logger):
     def isEnabledFor(self, level: int) -> bool:  # noqa: ARG002
         return True
 
+    @property
+    def debug_enabled(self) -> bool:
+        """Whether DEBUG records would pass `_PipRemoveFilter`."""
+        return not self.disabled and self._verbose_level >= 2
+
 
 _logger: _PipRemoveLogger | None = None
 
@@ -85,7 +93,7 @@ def setup_logging(quiet: bool, verbosity: int, logfile: IO[str] | None = None) -
         atexit.register(_log_fileobj.close)
 
 
-@attrs.define
+@attrs.define(slots=True, eq=False, repr=False)
 class PackageNotFound(Exception):
     pkg: str
 
@@ -95,7 +103,6 @@ class PackageNotFound(Exception):
 
 _DistributionDict: TypeAlias = dict[str, importlib_metadata.Distribution]
 __dists: _DistributionDict | None = None
-__alias_to_names: dict[str, str] = {}
 __pip_version__: str | None = None
 
 
@@ -108,33 +115,81 @@ def pip_version() -> str:
     return __pip_version__
 
 
+def _distribution_name(dist: importlib_metadata.Distribution) -> str | None:
+    """Name of `dist`, taken from its `.dist-info` directory name when unambiguous.
+
+    Like pip, the stem is only trusted when it is exactly `<name>-<version>`;
+    anything else (unescaped hyphens, `.egg-info`, ...) reads METADATA instead,
+    which gives `None` if the distribution has no metadata file.
+    """
+    dirname: str = getattr(getattr(dist, "_path", None), "name", "")
+    if dirname.endswith(".dist-info"):
+        stem = dirname[: -len(".dist-info")]
+        if stem.count("-") == 1:
+            return stem.partition("-")[0]
+    return dist.metadata["Name"]
+
+
 def distributions_as_dict() -> _DistributionDict:
     global __dists
     if __dists is None:
-        dists = importlib_metadata.distributions()
-        __dists = {d.name: d for d in dists}
+        __dists = {}
+        for d in importlib_metadata.distributions():
+            name = _distribution_name(d)
+            if not name:
+                # e.g. a leftover `.dist-info` with no METADATA
+                if _logger and _logger.debug_enabled:
+                    _logger.debug(f"skipping nameless distribution at {d}")
+                continue
+            __dists[canonicalize_name(name)] = d
         if _logger:
             _logger.debug(f"{len(__dists)} packages found.")
     return __dists
 
 
+_pkg_to_reqs_cache: dict[str, frozenset[str]] | None = None
+
+
+def _get_package_to_requirements() -> dict[str, frozenset[str]]:
+    """Map every installed package to its requirement names, computed once."""
+    global _pkg_to_reqs_cache
+    if _pkg_to_reqs_cache is None:
+        _pkg_to_reqs_cache = {
+            mod: frozenset(get_requirement_names(dist))
+            for mod, dist in distributions_as_dict().items()
+        }
+    return _pkg_to_reqs_cache
+
+
+_required_by_cache: dict[str, set[str]] | None = None
+
+
+def _get_required_by() -> dict[str, set[str]]:
+    """Reverse of `_get_package_to_requirements`: requirement -> its dependents."""
+    global _required_by_cache
+    if _required_by_cache is None:
+        _required_by_cache = {}
+        for pkg, reqs in _get_package_to_requirements().items():
+            for r in reqs:
+                _required_by_cache.setdefault(r, set()).add(pkg)
+    return _required_by_cache
+
+
+def _invalidate_caches() -> None:
+    """Forget cached environment state (e.g. after uninstalling packages)."""
+    global __dists, _pkg_to_reqs_cache, _required_by_cache
+    __dists = None
+    _pkg_to_reqs_cache = None
+    _required_by_cache = None
+
+
 def get_distribution(name: str) -> importlib_metadata.Distribution:
-    dists = distributions_as_dict()
-    try:
-        if _logger:
-            _logger.debug(f"Attempting to package {name}")
-        d = dists[name]
-    except KeyError:
-        try:
-            name = __alias_to_names[name]
-            if _logger:
-                _logger.debug(f"True package name is {name}")
-        except KeyError:
-            d = importlib_metadata.distribution(name)
-            __alias_to_names[name] = d.name
-        else:
-            d = dists[name]
-    if _logger:
+    if _logger and _logger.debug_enabled:
+        _logger.debug(f"Attempting to package {name}")
+    d = distributions_as_dict().get(canonicalize_name(name))
+    if d is None:
+        raise importlib_metadata.PackageNotFoundError(name)
+    if _logger and _logger.debug_enabled:
         _logger.debug(f"Got package {d.name} version {d.version}")
     return d
 
@@ -145,43 +200,47 @@ def does_pkg_exists(pkg: str) -> bool:
         get_distribution(pkg)
         return True
     except importlib_metadata.PackageNotFoundError:
-        if _logger:
+        if _logger and _logger.debug_enabled:
             _logger.debug(f"cannot found {pkg}")
         return False
 
 
 def execpip(*args: str) -> None:
     """Execute pip with `args`."""
-    if _logger:
+    if _logger and _logger.debug_enabled:
         _logger.debug(f"pip version: {pip_version()}")
     out = subprocess.run([*BASE_PIP_ARGS, *args], check=False)
     if _logger:
         _logger.debug(f"exit code is {out.returncode}")
 
 
-def choice(message: str) -> bool:
-    CHOICE_YES_REGEX = re.compile(r"^([y]|yes)$", re.DOTALL | re.IGNORECASE)
-    CHOICE_NO_REGEX = re.compile(r"^([n]|no)$", re.DOTALL | re.IGNORECASE)
-    ANSWERS = {CHOICE_YES_REGEX: True, CHOICE_NO_REGEX: False}
+_YES = frozenset({"y", "yes"})
+_NO = frozenset({"n", "no"})
+
 
+def choice(message: str) -> bool:
     message = f"{message} (y/n/yes/no): "
     while True:
         if answer := input(message).strip():
-            for pat, result in ANSWERS.items():
-                if pat.match(answer):
-                    return result
+            low = answer.lower()
+            if low in _YES:
+                return True
+            if low in _NO:
+                return False
             print("error: not a choice, must be y, n, yes or no")
 
 
-def get_requirements(
-    dist: importlib_metadata.Distribution,
-) -> tuple[packaging.requirements.Requirement, ...]:
-    return tuple(
-        map(packaging.requirements.Requirement, always_iterable(dist.requires))
-    )
+def get_requirement_names(dist: importlib_metadata.Distribution) -> tuple[str, ...]:
+    """Canonical names of `dist` requirements, without a full PEP 508 parse."""
+    names: list[str] = []
+    for line in always_iterable(dist.requires):
+        name = line.split(";", 1)[0].split("[", 1)[0].strip()
+        name = _REQUIREMENT_NAME_END.split(name, 1)[0]
+        names.append(canonicalize_name(name))
+    return tuple(names)
 
 
-@attrs.define(kw_only=True)
+@attrs.define(kw_only=True, slots=True, eq=False, repr=False)
 class DependencyData:
     target: str
     whitelisted: set[tuple[str, str]] = attrs.field(factory=set, init=False)
@@ -205,40 +264,36 @@ class PackageDependencyUninstalltionResolver:
     def __init__(self, *, target: str) -> None:
         if not does_pkg_exists(target):
             raise ValueError(f"Package '{target}' not found")
-        self._depenency_data = DependencyData(target=target)
+        self._depenency_data = DependencyData(target=canonicalize_name(target))
 
     @property
     def depenency_data(self) -> DependencyData:
         return self._depenency_data
 
-    def _analyze_package_dependencies(self, package: str):
-        """Analyze a single `package`."""
+    def _analyze_package_dependencies(
+        self,
+        package: str,
+        package_to_requirements: dict[str, frozenset[str]],
+        required_by: dict[str, set[str]],
+    ):
+        """Analyze a single canonical `package` against a precomputed dependency map."""
         # do not check if...
         if package in WHITELIST or package in self.depenency_data.analyzed_packages:
-            if _logger:
+            if _logger and _logger.debug_enabled:
                 _logger.debug(f"{package} already analyzed, skipping...")
             return
 
         # else...
 
-        package_to_requirements = {
-            mod: tuple(d.name for d in get_requirements(dist))
-            for mod, dist in distributions_as_dict().items()
-        }
-
-        if _logger:
+        if _logger and _logger.debug_enabled:
             _logger.debug(f"pulling requirements from {package}")
 
         try:
             requirements = package_to_requirements[package]
         except KeyError:
-            package = get_distribution(package).name
-            try:
-                requirements = package_to_requirements[package]
-            except KeyError:
-                raise RuntimeError("we fail again") from None
+            raise PackageNotFound(package) from None
 
-        if _logger:
+        if _logger and _logger.debug_enabled:
             _logger.debug(f"got {len(requirements)} depenencies")
 
         self.depenency_data.safe_to_removed.setdefault(package, set())
@@ -253,32 +308,37 @@ class PackageDependencyUninstalltionResolver:
             else:
                 vaild_requirements.add(entry)
 
-        if _logger:
+        target = self.depenency_data.target
+
+        # a leaf has nothing to check (safe_to_removed/required_by already set empty)
+        if not vaild_requirements and package != target:
+            self.depenency_data.analyzed_packages.add(package)
+            if _logger and _logger.debug_enabled:
+                _logger.debug(f"{package} has no dependencies to analyze")
+            return
+
+        if _logger and _logger.debug_enabled:
             _logger.debug("analyzing depenencies...")
 
-        if package == self.depenency_data.target:
-            for package_to_check, requirements in package_to_requirements.items():
-                if (
-                    package in requirements
-                    and package_to_check != package
-                    and package_to_check not in WHITELIST
-                ):
-                    self.depenency_data.this_requires_by.add(package_to_check)
+        if package == target:
+            self.depenency_data.this_requires_by.update(
+                required_by.get(package, set()) - {package} - WHITELIST
+            )
 
         for depenency in vaild_requirements:
-            for package_to_check, requirements in package_to_requirements.items():
-                if (
-                    depenency in requirements
-                    and package_to_check != package
-                    and package_to_check not in vaild_requirements
-                    and package_to_check not in WHITELIST
-                    and package_to_check != self.depenency_data.target
-                ):
-                    (
-                        self.depenency_data.package_depenencies_required_by[package]
-                        .setdefault(depenency, set())
-                        .add(package_to_check)
-                    )
+            users = (
+                required_by.get(depenency, set())
+                - {package}
+                - vaild_requirements
+                - WHITELIST
+                - {target}
+            )
+            if users:
+                (
+                    self.depenency_data.package_depenencies_required_by[package]
+                    .setdefault(depenency, set())
+                    .update(users)
+                )
 
         self.depenency_data.safe_to_removed[package] = {
             d
@@ -288,30 +348,45 @@ class PackageDependencyUninstalltionResolver:
 
         self.depenency_data.analyzed_packages.add(package)
 
-        if _logger:
+        if _logger and _logger.debug_enabled:
             _logger.debug(f"analyzed {package}")
 
     def analyze_recursively(self) -> bool:
         """Analyze a `target` in `DependencyData` recursively."""
         target = self.depenency_data.target
-        self._analyze_package_dependencies(target)
+        package_to_requirements = _get_package_to_requirements()
+        required_by = _get_required_by()
+        self._analyze_package_dependencies(target, package_to_requirements, required_by)
         to_removed = self.depenency_data.safe_to_removed.get(target, set())
         if not to_removed:
             if _logger:
                 _logger.info("No package could not be found to be removed...")
             return False
 
-        for t in to_removed:
-            self._analyze_package_dependencies(t)
-
-        for i in self.depenency_data.this_requires_by.copy():
-            for mdep, mdep_deps in self.depenency_data.safe_to_removed.items():
-                if i in mdep_deps:
-                    if _logger:
-                        _logger.warning(
-                            f"NOTICE: {i} used {target} but also a dependency of {mdep} (which is a dependency of {target})"
-                        )
-                    self.depenency_data.this_requires_by.remove(i)
+        # iterative DFS over safe-to-remove dependencies; `black` holds finished nodes
+        black = {target}
+        stack = list(to_removed)
+        while stack:
+            p = stack.pop()
+            if p in black:
+                continue
+            self._analyze_package_dependencies(p, package_to_requirements, required_by)
+            black.add(p)
+            stack.extend(self.depenency_data.safe_to_removed.get(p, set()) - black)
+
+        # dep: a package whose safe-to-remove dependencies include it
+        dep_to_owner: dict[str, str] = {}
+        for mdep, mdep_deps in self.depenency_data.safe_to_removed.items():
+            for dep in mdep_deps:
+                dep_to_owner.setdefault(dep, mdep)
+
+        overlap = self.depenency_data.this_requires_by & dep_to_owner.keys()
+        if _logger:
+            for i in sorted(overlap):
+                _logger.warning(
+                    f"NOTICE: {i} used {target} but also a dependency of {dep_to_owner[i]} (which is a dependency of {target})"
+                )
+        self.depenency_data.this_requires_by -= overlap
         return True
 
 
@@ -376,24 +451,30 @@ class PipRemoveCLI:
                     for dep in deps:
                         print(format_indent(4) + f"{dep} (a dependency of {mod})")
 
-    def _remove_packages(
+    def _packages_to_remove(
         self, resolver: PackageDependencyUninstalltionResolver
-    ) -> None:
+    ) -> set[str]:
         uninstalled: set[str] = set()
         for deps in resolver.depenency_data.safe_to_removed.values():
             uninstalled.update(deps)
         uninstalled.add(resolver.depenency_data.target)
+        return uninstalled
+
+    def _remove_packages(self, uninstalled: set[str]) -> None:
+        if not uninstalled:
+            return
         if _logger:
             _logger.info("uninstalling packages...")
         base = ["uninstall", "--yes"]
         if self._quiet:
             base.append("--quiet")
-        execpip(*base, *uninstalled)
+        execpip(*base, *sorted(uninstalled))
+        _invalidate_caches()
 
-    def _main(self, resolver: PackageDependencyUninstalltionResolver) -> None:
+    def _main(self, resolver: PackageDependencyUninstalltionResolver) -> set[str]:
         rv = resolver.analyze_recursively()
         if not rv:
-            return
+            return set()
         self._print_results(resolver)
         if self._quiet or self._yes:  # noqa: SIM108
             yes = True
@@ -401,7 +482,8 @@ class PipRemoveCLI:
             yes = choice("Continue to uninstall?")
 
         if yes:
-            self._remove_packages(resolver)
+            return self._packages_to_remove(resolver)
+        return set()
 
     def main(
         self,
@@ -416,9 +498,11 @@ class PipRemoveCLI:
         self._verbose = verbose
         self._yes = yes
         setup_logging(quiet, verbose, log_file)
+        all_uninstalled: set[str] = set()
         for t in args:
             resolver = PackageDependencyUninstalltionResolver(target=t)
-            self._main(resolver)
+            all_uninstalled |= self._main(resolver)
+        self._remove_packages(all_uninstalled)
         return 0
 
 
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import importlib.metadata as importlib_metadata
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from pathlib import Path
+
+import pytest
+from typing_extensions import TypeAlias
+
+import pipremove_v2
+
+MakeDist: TypeAlias = Callable[..., importlib_metadata.Distribution]
+UseDistributions: TypeAlias = Callable[
+    [Iterable[importlib_metadata.Distribution]], None
+]
+
+
+@pytest.fixture
+def make_dist(tmp_path: Path) -> MakeDist:
+    """Factory for a `PathDistribution` on a fresh `dirname` under `tmp_path`.
+
+    With `name=None` no metadata file is written at all.
+    """
+
+    def factory(
+        dirname: str, name: str | None, requires: Sequence[str] = ()
+    ) -> importlib_metadata.Distribution:
+        path = tmp_path / dirname
+        path.mkdir()
+        if name is not None:
+            lines = ["Metadata-Version: 2.1", f"Name: {name}", "Version: 1.0"]
+            lines.extend(f"Requires-Dist: {r}" for r in requires)
+            metadata = "PKG-INFO" if dirname.endswith(".egg-info") else "METADATA"
+            (path / metadata).write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return importlib_metadata.PathDistribution(path)
+
+    return factory
+
+
+@pytest.fixture
+def use_distributions(monkeypatch: pytest.MonkeyPatch) -> Iterator[UseDistributions]:
+    """Make `pipremove_v2` see only the given distributions."""
+
+    def install(dists: Iterable[importlib_metadata.Distribution]) -> None:
+        dists = list(dists)
+        monkeypatch.setattr(
+            pipremove_v2.importlib_metadata, "distributions", lambda: dists
+        )
+        pipremove_v2._invalidate_caches()
+
+    yield install
+    pipremove_v2._invalidate_caches()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import pytest
+
+import pipremove_v2
+from pipremove_v2 import PipRemoveCLI
+from tests.conftest import MakeDist, UseDistributions
+
+ENVIRONMENT = {
+    "a": ["x"],
+    "b": ["y"],
+    "x": [],
+    "y": [],
+}
+
+
+@pytest.fixture
+def execpip_calls(
+    make_dist: MakeDist,
+    use_distributions: UseDistributions,
+    monkeypatch: pytest.MonkeyPatch,
+) -> list[tuple[str, ...]]:
+    use_distributions(
+        make_dist(f"{name}-1.0.dist-info", name, requires)
+        for name, requires in ENVIRONMENT.items()
+    )
+    # main() installs a module-level logger; put the old one back afterwards
+    monkeypatch.setattr(pipremove_v2, "_logger", None)
+    calls: list[tuple[str, ...]] = []
+    monkeypatch.setattr(pipremove_v2, "execpip", lambda *args: calls.append(args))
+    return calls
+
+
+def test_all_targets_uninstalled_in_one_call(
+    execpip_calls: list[tuple[str, ...]],
+) -> None:
+    PipRemoveCLI().main(("a", "b"), yes=True, quiet=False, verbose=0, log_file=None)
+    assert execpip_calls == [("uninstall", "--yes", "a", "b", "x", "y")]
+
+
+def test_nothing_uninstalled_when_every_prompt_declined(
+    execpip_calls: list[tuple[str, ...]], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    prompts: list[str] = []
+
+    def decline(message: str) -> bool:
+        prompts.append(message)
+        return False
+
+    monkeypatch.setattr(pipremove_v2, "choice", decline)
+    PipRemoveCLI().main(("a", "b"), yes=False, quiet=False, verbose=0, log_file=None)
+    assert len(prompts) == 2
+    assert execpip_calls == []
+
+
+def test_remove_nothing_does_not_spawn_pip(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[object] = []
+    monkeypatch.setattr(pipremove_v2.subprocess, "run", lambda *a, **k: calls.append(a))
+    PipRemoveCLI()._remove_packages(set())
+    assert calls == []
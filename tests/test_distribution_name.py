@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import pytest
+from packaging.utils import canonicalize_name
+
+from pipremove_v2 import _distribution_name, distributions_as_dict
+from tests.conftest import MakeDist, UseDistributions
+
+
+def test_escaped_dist_info_name_skips_metadata(make_dist: MakeDist) -> None:
+    # no METADATA at all: the name must come from the directory
+    dist = make_dist("foo_bar-1.0.dist-info", None)
+    assert _distribution_name(dist) == "foo_bar"
+
+
+def test_unescaped_hyphen_falls_back_to_metadata(make_dist: MakeDist) -> None:
+    dist = make_dist("foo-bar-1.0.dist-info", "foo-bar")
+    assert canonicalize_name(_distribution_name(dist)) == "foo-bar"
+
+
+def test_egg_info_falls_back_to_metadata(make_dist: MakeDist) -> None:
+    dist = make_dist("foo_bar-1.0-py3.11.egg-info", "foo-bar")
+    assert canonicalize_name(_distribution_name(dist)) == "foo-bar"
+
+
+@pytest.mark.parametrize("dirname", ["foo-bar-1.0.dist-info", "x-1.0-py3.11.egg-info"])
+def test_nameless_distributions_are_skipped(
+    make_dist: MakeDist, use_distributions: UseDistributions, dirname: str
+) -> None:
+    use_distributions(
+        [make_dist(dirname, None), make_dist("real-1.0.dist-info", "real")]
+    )
+    assert list(distributions_as_dict()) == ["real"]
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import packaging.requirements
+import pytest
+from packaging.utils import canonicalize_name
+
+from pipremove_v2 import get_requirement_names
+from tests.conftest import MakeDist
+
+REQUIREMENTS = [
+    "plain",
+    "Mixed_Case.Name",
+    "spec>=1.0,<2",
+    "spaced >= 1.0",
+    "tabbed\t>=1.0",
+    "paren (>=1.0)",
+    "extras[a,b]>=1.0",
+    "marker; python_version < '4'",
+    "both[x] >=1 ; extra == 'test'",
+    "direct @ https://example.com/direct-1.0.tar.gz",
+    "compat~=1.4",
+    "exclude!=1.1",
+]
+
+
+@pytest.mark.parametrize("requirement", REQUIREMENTS)
+def test_matches_pep508_parser(make_dist: MakeDist, requirement: str) -> None:
+    expected = canonicalize_name(packaging.requirements.Requirement(requirement).name)
+    dist = make_dist("demo-1.0.dist-info", "demo", [requirement])
+    assert get_requirement_names(dist) == (expected,)
+
+
+def test_no_requirements(make_dist: MakeDist) -> None:
+    assert get_requirement_names(make_dist("demo-1.0.dist-info", "demo")) == ()
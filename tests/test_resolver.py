@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pytest
+
+import pipremove_v2
+from pipremove_v2 import PackageDependencyUninstalltionResolver, PipRemoveCLI
+from tests.conftest import MakeDist, UseDistributions
+
+# target -> alpha -> charlie -> delta, plus a `shared` dependency still needed by `outsider`
+ENVIRONMENT = {
+    "target": ["alpha>=1", "shared"],
+    "alpha": ["charlie"],
+    "charlie": ["delta"],
+    "delta": [],
+    "shared": [],
+    "outsider": ["shared"],
+}
+
+
+@pytest.fixture
+def environment(make_dist: MakeDist, use_distributions: UseDistributions) -> None:
+    use_distributions(
+        make_dist(f"{name}-1.0.dist-info", name, requires)
+        for name, requires in ENVIRONMENT.items()
+    )
+
+
+@pytest.mark.usefixtures("environment")
+def test_removes_transitive_dependencies_but_keeps_shared() -> None:
+    resolver = PackageDependencyUninstalltionResolver(target="target")
+    assert resolver.analyze_recursively()
+
+    data = resolver.depenency_data
+    assert data.safe_to_removed == {
+        "target": {"alpha"},
+        "alpha": {"charlie"},
+        "charlie": {"delta"},
+        "delta": set(),
+    }
+    assert data.package_depenencies_required_by["target"] == {"shared": {"outsider"}}
+    assert data.analyzed_packages == {"target", "alpha", "charlie", "delta"}
+    assert not data.this_requires_by
+
+    assert PipRemoveCLI()._packages_to_remove(resolver) == {
+        "target",
+        "alpha",
+        "charlie",
+        "delta",
+    }
+
+
+class _RecordingLogger:
+    debug_enabled = False
+
+    def __init__(self) -> None:
+        self.warnings: list[str] = []
+
+    def debug(self, msg: str) -> None:
+        pass
+
+    def info(self, msg: str) -> None:
+        pass
+
+    def warning(self, msg: str) -> None:
+        self.warnings.append(msg)
+
+
+def test_dependent_under_two_owners_is_dropped_once(
+    make_dist: MakeDist,
+    use_distributions: UseDistributions,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # `user` requires the target, yet is a safe-to-remove dependency of both
+    # the target and `alpha`
+    use_distributions(
+        [
+            make_dist("target-1.0.dist-info", "target", ["alpha", "user"]),
+            make_dist("alpha-1.0.dist-info", "alpha", ["user"]),
+            make_dist("user-1.0.dist-info", "user", ["target"]),
+        ]
+    )
+    logger = _RecordingLogger()
+    monkeypatch.setattr(pipremove_v2, "_logger", logger)
+
+    resolver = PackageDependencyUninstalltionResolver(target="target")
+    assert resolver.analyze_recursively()
+
+    data = resolver.depenency_data
+    assert "user" in data.safe_to_removed["target"]
+    assert "user" in data.safe_to_removed["alpha"]
+    assert data.this_requires_by == set()
+    assert len(logger.warnings) == 1
+    assert logger.warnings[0].startswith("NOTICE: user used target")